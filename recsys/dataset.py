@@ -44,7 +44,7 @@ import numpy as np
 from .six.moves import input
 from .six.moves.urllib.request import urlretrieve
 from .six.moves import range
-from .six import iteritems
+from .six import iteritems, itervalues
 
 
 # directory where builtin datasets are stored. For now it's in the home
@@ -473,6 +473,10 @@ class Trainset:
         ir(:obj:`defaultdict` of :obj:`list`): A dictionary containing lists of
             tuples of the form ``(user_inner_id, rating)``. Keys are item inner
             ids.  ``ir`` stands for *item ratings*.
+        raw2inner_id_users(:obj:`dict`): A dictionary mapping raw user ids to
+            inner user ids.
+        raw2inner_id_items(:obj:`dict`): A dictionary mapping raw item ids to
+            inner item ids.
         n_users: Total number of users :math:`|U|`.
         n_items: Total number of items :math:`|I|`.
         n_ratings: Total number of ratings :math:`|R_{train}|`.
@@ -489,12 +493,17 @@ class Trainset:
         self.ir = ir
         self.n_users = n_users
         self.n_items = n_items
-        self.n_ratings = len(self.rm)
+        # counted over ur (and not rm, which is keyed by (user, item) and
+        # thus collapses duplicated ratings): this is what all_ratings and
+        # the rating arrays actually iterate
+        self.n_ratings = sum(len(u_ratings)
+                             for u_ratings in itervalues(self.ur))
         self.r_min = r_min
         self.r_max = r_max
-        self._raw2inner_id_users = raw2inner_id_users
-        self._raw2inner_id_items = raw2inner_id_items
+        self.raw2inner_id_users = raw2inner_id_users
+        self.raw2inner_id_items = raw2inner_id_items
         self._global_mean = None
+        self._uir_arrays = None
 
     def knows_user(self, uid):
         """Indicate if the user is part of the trainset.
@@ -507,7 +516,9 @@ class Trainset:
             ``True`` if user is part of the trainset, else ``False``.
         """
 
-        return uid in self.ur
+        # inner ids are dense, so a simple bounds check is enough (and
+        # cheaper than a dict lookup). Unknown users have the inner id -1.
+        return 0 <= uid < self.n_users
 
     def knows_item(self, iid):
         """Indicate if the item is part of the trainset.
@@ -520,7 +531,7 @@ class Trainset:
             ``True`` if item is part of the trainset, else ``False``.
         """
 
-        return iid in self.ir
+        return 0 <= iid < self.n_items
 
     def to_inner_uid(self, ruid):
         """Convert a raw **user** id to an inner id.
@@ -538,7 +549,7 @@ class Trainset:
         """
 
         try:
-            return self._raw2inner_id_users[ruid]
+            return self.raw2inner_id_users[ruid]
         except KeyError:
             raise ValueError(('User ' + str(ruid) +
                               ' is not part of the trainset.'))
@@ -559,11 +570,48 @@ class Trainset:
         """
 
         try:
-            return self._raw2inner_id_items[riid]
+            return self.raw2inner_id_items[riid]
         except KeyError:
             raise ValueError(('Item ' + str(riid) +
                               ' is not part of the trainset.'))
 
+    def _build_uir_arrays(self):
+        """Build (once) and return all the ratings in coordinate form: three
+        arrays ``(u_idx, i_idx, r_vals)`` of inner user ids, inner item ids
+        and ratings. This is the canonical form used by the computation
+        kernels; ratings are stored as float32, which is exact for usual
+        rating scales."""
+
+        if self._uir_arrays is None:
+            u_idx = np.empty(self.n_ratings, dtype=np.int_)
+            i_idx = np.empty(self.n_ratings, dtype=np.int_)
+            r_vals = np.empty(self.n_ratings, dtype=np.float32)
+            k = 0
+            for u, u_ratings in iteritems(self.ur):
+                for i, r in u_ratings:
+                    u_idx[k] = u
+                    i_idx[k] = i
+                    r_vals[k] = r
+                    k += 1
+            self._uir_arrays = (u_idx, i_idx, r_vals)
+
+        return self._uir_arrays
+
+    @property
+    def u_idx(self):
+        """Array of the inner user id of every rating."""
+        return self._build_uir_arrays()[0]
+
+    @property
+    def i_idx(self):
+        """Array of the inner item id of every rating."""
+        return self._build_uir_arrays()[1]
+
+    @property
+    def r_vals(self):
+        """Array of the value of every rating."""
+        return self._build_uir_arrays()[2]
+
     def all_ratings(self):
         """Generator function to iterate over all ratings.
 
@@ -571,9 +619,8 @@ class Trainset:
             A tuple ``(uid, iid, rating)`` where ids are inner ids.
         """
 
-        for u, u_ratings in iteritems(self.ur):
-            for i, r in u_ratings:
-                yield u, i, r
+        u_idx, i_idx, r_vals = self._build_uir_arrays()
+        return zip(u_idx, i_idx, r_vals)
 
     def all_users(self):
         """Generator function to iterate over all users.
@@ -597,7 +644,6 @@ class Trainset:
 
         It's only computed once."""
         if self._global_mean is None:
-            self._global_mean = np.mean(
-                                [r for (_, _, r) in self.all_ratings()])
+            self._global_mean = np.mean(self.r_vals, dtype=np.float64)
 
         return self._global_mean
@@ -0,0 +1,94 @@
+"""
+The :mod:`recsys.prediction_algorithms._baselines` module provides compiled
+kernels for the baseline estimates computation. It is built along with the
+other Cython extensions; :mod:`algo_base
+<recsys.prediction_algorithms.algo_base>` falls back to its NumPy
+implementations when the extension is not available.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+cimport cython
+
+import numpy as np
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void _sgd(long[:] u_idx, long[:] i_idx, float[:] r_vals,
+                float[:] bu, float[:] bi, double global_mean, double lr,
+                double reg, int n_epochs):
+    """Optimize ``bu`` and ``bi`` in place with SGD, one rating at a time."""
+
+    cdef int n_ratings = r_vals.shape[0]
+    cdef int epoch, k
+    cdef long u, i
+    cdef double err
+
+    for epoch in range(n_epochs):
+        for k in range(n_ratings):
+            u = u_idx[k]
+            i = i_idx[k]
+            err = r_vals[k] - (global_mean + bu[u] + bi[i])
+            bu[u] += lr * (err - reg * bu[u])
+            bi[i] += lr * (err - reg * bi[i])
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void _als(long[:] u_idx, long[:] i_idx, float[:] r_vals,
+                long[:] ubi_idx, long[:] ibi_idx, float[:] rbi_vals,
+                float[:] bu, float[:] bi, long[:] counts_u, long[:] counts_i,
+                double global_mean, double reg_u, double reg_i, int n_epochs,
+                double tol):
+    """Optimize ``bu`` and ``bi`` in place with the alternating closed-form
+    updates, stopping early once the largest bias update drops below
+    ``tol``. Mirrors the bincount-based NumPy path of ``optimize_als``.
+
+    The first rating array triple is user-major and drives the ``bu``
+    update; the second one is sorted by item and drives the ``bi`` update,
+    so both accumulation passes walk their target array in order."""
+
+    cdef int n_ratings = r_vals.shape[0]
+    cdef int n_users = bu.shape[0]
+    cdef int n_items = bi.shape[0]
+
+    # scatter-add accumulators for the per-item and per-user deviations
+    cdef double[:] acc_i = np.zeros(n_items)
+    cdef double[:] acc_u = np.zeros(n_users)
+
+    cdef int epoch, k, u, i
+    cdef double delta, diff, new_b
+
+    for epoch in range(n_epochs):
+        delta = 0
+
+        for i in range(n_items):
+            acc_i[i] = 0
+        for k in range(n_ratings):
+            acc_i[ibi_idx[k]] += rbi_vals[k] - global_mean - bu[ubi_idx[k]]
+        for i in range(n_items):
+            new_b = acc_i[i] / (reg_i + counts_i[i])
+            diff = new_b - bi[i]
+            if diff < 0:
+                diff = -diff
+            if diff > delta:
+                delta = diff
+            bi[i] = <float>new_b
+
+        for u in range(n_users):
+            acc_u[u] = 0
+        for k in range(n_ratings):
+            acc_u[u_idx[k]] += r_vals[k] - global_mean - bi[i_idx[k]]
+        for u in range(n_users):
+            new_b = acc_u[u] / (reg_u + counts_u[u])
+            diff = new_b - bu[u]
+            if diff < 0:
+                diff = -diff
+            if diff > delta:
+                delta = diff
+            bu[u] = <float>new_b
+
+        if delta < tol:
+            break
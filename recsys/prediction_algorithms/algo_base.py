@@ -7,13 +7,82 @@ which every single prediction algorithm has to inherit.
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import functools
+import hashlib
+import os
+
 import numpy as np
 
 from .. import similarities as sims
 from .predictions import PredictionImpossible
 from .predictions import Prediction
+from ..six import iteritems
 from ..six.moves import range
 
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+# name -> similarity construction function, built once at import time
+_SIM_FUNCS = {'cosine': sims.cosine,
+              'msd': sims.msd,
+              'pearson': sims.pearson,
+              'pearson_baseline': sims.pearson_baseline}
+
+# inner id given to unknown users and items. Inner ids of the trainset are
+# all >= 0, so knows_user and knows_item are false for it, and it involves
+# no per-call object creation (unlike the 'UKN__'-prefixed strings that were
+# once built for every unknown id).
+UNKNOWN_INNER_ID = -1
+
+try:
+    from . import _baselines as _c_baselines
+except ImportError:  # the extension has not been compiled
+    _c_baselines = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _sgd_biases(u_idx, i_idx, r_vals, bu, bi, global_mean, lr, reg,
+                    n_epochs):
+        """JIT-compiled SGD over the rating arrays, updating ``bu`` and
+        ``bi`` in place, one rating at a time as in plain SGD."""
+
+        for dummy in range(n_epochs):
+            for k in range(len(r_vals)):
+                u = u_idx[k]
+                i = i_idx[k]
+                err = r_vals[k] - (global_mean + bu[u] + bi[i])
+                bu[u] += lr * (err - reg * bu[u])
+                bi[i] += lr * (err - reg * bi[i])
+
+    @njit(parallel=True, cache=True)
+    def _sgd_biases_hogwild(u_idx, i_idx, r_vals, perm, bu, bi, global_mean,
+                            lr, reg, n_epochs):
+        """Hogwild-style parallel version of :func:`_sgd_biases`: the
+        ratings (visited through the ``perm`` permutation) are split over
+        threads which update ``bu`` and ``bi`` concurrently without locks.
+        Updates are sparse per index so collisions are rare, and racy ones
+        do not prevent convergence."""
+
+        n_ratings = len(r_vals)
+        for dummy in range(n_epochs):
+            for kk in prange(n_ratings):
+                k = perm[kk]
+                u = u_idx[k]
+                i = i_idx[k]
+                err = r_vals[k] - (global_mean + bu[u] + bi[i])
+                bu[u] += lr * (err - reg * bu[u])
+                bi[i] += lr * (err - reg * bi[i])
+else:
+    _sgd_biases = _sgd_biases_hogwild = None
+
 
 class AlgoBase:
     """Abstract class where is defined the basic behaviour of a prediction
@@ -24,15 +93,46 @@ class AlgoBase:
             baseline estimate, the ``baseline_options`` parameter is used to
             configure how they are computed. See
             :ref:`baseline_estimates_configuration` for usage.
+        n_jobs(int, optional): The number of workers used by the :meth:`test`
+            method to compute predictions in parallel. ``-1`` means using all
+            cores. Requires `joblib <https://joblib.readthedocs.io>`_ to be
+            installed; if it is not, predictions are computed sequentially.
+            Default is ``1``.
     """
 
     def __init__(self, **kwargs):
 
         self.bsl_options = kwargs.get('bsl_options', {})
         self.sim_options = kwargs.get('sim_options', {})
+        self.n_jobs = kwargs.get('n_jobs', 1)
         if 'user_based' not in self.sim_options:
             self.sim_options['user_based'] = True
 
+        # Resolve the similarity strategy once, with its scalar parameters
+        # already bound: compute_similarities only has to supply the
+        # trainset-dependent arguments.
+        self._sim_name = self.sim_options.get('name', 'msd').lower()
+        try:
+            sim_func = _SIM_FUNCS[self._sim_name]
+        except KeyError:
+            raise NameError('Wrong sim name ' + self._sim_name + '. Allowed '
+                            'values are ' + ', '.join(_SIM_FUNCS.keys()) +
+                            '.')
+        min_support = self.sim_options.get('min_support', 1)
+        if self._sim_name == 'pearson_baseline':
+            self._sim_fn = functools.partial(
+                sim_func, min_support=min_support,
+                shrinkage=self.sim_options.get('shrinkage', 100))
+        else:
+            self._sim_fn = functools.partial(sim_func,
+                                             min_support=min_support)
+
+        # baselines of previously seen trainsets, keyed by raw id, only
+        # filled when the 'warm_start' field of bsl_options is set (see
+        # compute_baselines and _initial_biases).
+        self._prev_bu_by_raw = {}
+        self._prev_bi_by_raw = {}
+
     def train(self, trainset):
         """Train an algorithm on a given training set.
 
@@ -50,6 +150,52 @@ class AlgoBase:
 
         # (re) Initialise baselines
         self.bu = self.bi = None
+        self._baselines = None
+
+        # (re) Initialise the rating counts and the item-sorted rating
+        # arrays, lazily built from the trainset (see _get_ratings_counts
+        # and _get_ratings_arrays_by_item)
+        self._ratings_counts = None
+        self._ratings_by_item = None
+
+    def _get_ratings_arrays(self):
+        """Return all the ratings as three arrays ``(u_idx, i_idx, r_vals)``.
+
+        These are the trainset's canonical coordinate-form arrays: they allow
+        the optimization procedures to work on whole vectors of ratings
+        instead of looping over Python tuples.
+        """
+
+        return self.trainset._build_uir_arrays()
+
+    def _get_ratings_arrays_by_item(self):
+        """Return the rating arrays sorted by inner item id.
+
+        The canonical arrays are user-major, which keeps the user-side
+        reductions of ALS walking ``bu`` sequentially; this item-sorted copy
+        does the same for the item side, so that scatter targets stay
+        cache-resident instead of jumping around ``bi``."""
+
+        if self._ratings_by_item is None:
+            u_idx, i_idx, r_vals = self._get_ratings_arrays()
+            order = np.argsort(i_idx, kind='stable')
+            self._ratings_by_item = (u_idx[order], i_idx[order],
+                                     r_vals[order])
+
+        return self._ratings_by_item
+
+    def _get_ratings_counts(self):
+        """Return the number of ratings of each user and each item, as two
+        arrays ``(counts_u, counts_i)``. Built once and cached, like the
+        rating arrays they are computed from."""
+
+        if self._ratings_counts is None:
+            u_idx, i_idx, _ = self._get_ratings_arrays()
+            counts_u = np.bincount(u_idx, minlength=self.trainset.n_users)
+            counts_i = np.bincount(i_idx, minlength=self.trainset.n_items)
+            self._ratings_counts = (counts_u, counts_i)
+
+        return self._ratings_counts
 
     def predict(self, uid, iid, r=0, verbose=False):
         """Compute the rating prediction for given user and item.
@@ -73,15 +219,61 @@ class AlgoBase:
             <recsys.prediction_algorithms.predictions.Prediction>` object.
         """
 
-        # Convert raw ids to inner ids
-        try:
-            iuid = self.trainset.to_inner_uid(uid)
-        except ValueError:
-            iuid = 'UKN__' + str(uid)
-        try:
-            iiid = self.trainset.to_inner_iid(iid)
-        except ValueError:
-            iiid = 'UKN__' + str(iid)
+        # Convert raw ids to inner ids. Unknown users and items get the
+        # UNKNOWN_INNER_ID, which no trainset user or item can have: a plain
+        # dict lookup is a lot cheaper than catching a ValueError on every
+        # call.
+        iuid = self.trainset.raw2inner_id_users.get(uid, UNKNOWN_INNER_ID)
+        iiid = self.trainset.raw2inner_id_items.get(iid, UNKNOWN_INNER_ID)
+
+        return self._predict_inner(uid, iid, iuid, iiid, r, verbose)
+
+    def _predict_inner(self, uid, iid, iuid, iiid, r, verbose):
+        """Same as :meth:`predict`, but with raw ids already converted to
+        inner ids (``UNKNOWN_INNER_ID`` meaning unknown)."""
+
+        est, details = self._estimate_raw(iuid, iiid)
+
+        # clip estimate into [self.r_min, self.r_max]
+        est = min(self.trainset.r_max, est)
+        est = max(self.trainset.r_min, est)
+
+        pred = Prediction(uid, iid, r, est, details)
+
+        if verbose:
+            print(pred)
+
+        return pred
+
+    def estimate_batch(self, iuids, iiids):
+        """Estimate the ratings of whole arrays of inner ids at once.
+
+        ``iuids`` and ``iiids`` are arrays of inner ids,
+        ``UNKNOWN_INNER_ID`` meaning unknown. This default implementation
+        just calls :meth:`estimate` on every pair; derived classes whose
+        estimation can be expressed with
+        array operations may override it and compute all the (unclipped)
+        estimates in a few vectorized passes.
+
+        Returns:
+            A tuple ``(ests, details_list)`` where ``ests`` is an array of
+            unclipped estimates and ``details_list`` the matching list of
+            details dicts.
+        """
+
+        ests = np.empty(len(iuids), dtype=np.float64)
+        details_list = []
+        for k, (iuid, iiid) in enumerate(zip(iuids, iiids)):
+            est, details = self._estimate_raw(iuid, iiid)
+            ests[k] = est
+            details_list.append(details)
+
+        return ests, details_list
+
+    def _estimate_raw(self, iuid, iiid):
+        """Call :meth:`estimate` on inner ids and return an ``(est,
+        details)`` pair, with the estimate not yet clipped to the rating
+        scale."""
 
         details = {}
         try:
@@ -98,16 +290,7 @@ class AlgoBase:
             details['was_impossible'] = True
             details['reason'] = str(e)
 
-        # clip estimate into [self.r_min, self.r_max]
-        est = min(self.trainset.r_max, est)
-        est = max(self.trainset.r_min, est)
-
-        pred = Prediction(uid, iid, r, est, details)
-
-        if verbose:
-            print(pred)
-
-        return pred
+        return est, details
 
     def test(self, testset, verbose=False):
         """Test the algorithm on given testset.
@@ -123,10 +306,68 @@ class AlgoBase:
                 <recsys.prediction_algorithms.predictions.Prediction>` objects.
         """
 
-        predictions = [self.predict(uid, iid, r, verbose=verbose)
-                       for (uid, iid, r) in testset]
+        # Convert all the raw ids in one pass (see predict), so that the
+        # conversion layer is out of the per-prediction work.
+        raw2inner_u = self.trainset.raw2inner_id_users
+        raw2inner_i = self.trainset.raw2inner_id_items
+        iuids = np.fromiter((raw2inner_u.get(uid, UNKNOWN_INNER_ID)
+                             for (uid, _, _) in testset),
+                            dtype=np.int_, count=len(testset))
+        iiids = np.fromiter((raw2inner_i.get(iid, UNKNOWN_INNER_ID)
+                             for (_, iid, _) in testset),
+                            dtype=np.int_, count=len(testset))
+
+        # every prediction is independent from the others, so they can be
+        # computed in parallel when joblib is available
+        if self.n_jobs != 1 and Parallel is not None:
+            predictions = Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                delayed(self._predict_inner)(uid, iid, iuid, iiid, r, verbose)
+                for (uid, iid, r), iuid, iiid in zip(testset, iuids, iiids))
+        else:
+            # Estimate all ratings first, clip them to the rating scale in a
+            # single vectorized pass, and only then wrap them in Prediction
+            # objects.
+            ests, details_list = self.estimate_batch(iuids, iiids)
+
+            ests = np.asarray(ests, dtype=np.float64)
+            np.clip(ests, self.trainset.r_min, self.trainset.r_max, out=ests)
+
+            predictions = []
+            for (uid, iid, r), est, details in zip(testset, ests,
+                                                   details_list):
+                pred = Prediction(uid, iid, r, est, details)
+                if verbose:
+                    print(pred)
+                predictions.append(pred)
         return predictions
 
+    def _initial_biases(self):
+        """Return the initial ``(bu, bi)`` arrays for the baseline
+        optimization.
+
+        Biases start at zero. If the ``warm_start`` field of ``bsl_options``
+        is set, users and items already seen on a previous trainset of the
+        same algorithm instead start from their previously computed values.
+        Beware: across cross-validation folds this leaks ratings of a fold's
+        test set into its starting point, which makes the reported accuracies
+        optimistic (SGD in particular runs a fixed number of epochs and never
+        washes the leak out), so it is off by default and only meant for
+        successive trainsets that are legitimately related.
+
+        float32 is plenty for biases on a (1, 5)-ish rating scale, and
+        halves the traffic through the bias arrays."""
+
+        bu = np.zeros(self.trainset.n_users, dtype=np.float32)
+        bi = np.zeros(self.trainset.n_items, dtype=np.float32)
+
+        if self._prev_bu_by_raw:
+            for raw_u, inner_u in iteritems(self.trainset.raw2inner_id_users):
+                bu[inner_u] = self._prev_bu_by_raw.get(raw_u, 0.0)
+            for raw_i, inner_i in iteritems(self.trainset.raw2inner_id_items):
+                bi[inner_i] = self._prev_bi_by_raw.get(raw_i, 0.0)
+
+        return bu, bi
+
     def compute_baselines(self):
         """Compute users and items baselines.
 
@@ -141,24 +382,48 @@ class AlgoBase:
         # trainset, then just return. Indeed, compute_baselines may be called
         # more than one time, for example when a similarity metric (e.g.
         # pearson_baseline) uses baseline estimates.
-        if self.bu is not None:
-            return self.bu, self.bi
+        if self._baselines is not None:
+            return self._baselines
 
         def optimize_sgd():
             """Optimize biases using sgd"""
 
-            bu = np.zeros(self.trainset.n_users)
-            bi = np.zeros(self.trainset.n_items)
+            bu, bi = self._initial_biases()
 
             reg = self.bsl_options.get('reg', 0.02)
             lr = self.bsl_options.get('learning_rate', 0.005)
             n_epochs = self.bsl_options.get('n_epochs', 20)
 
-            for dummy in range(n_epochs):
-                for u, i, r in self.trainset.all_ratings():
-                    err = (r - (self.trainset.global_mean + bu[u] + bi[i]))
-                    bu[u] += lr * (err - reg * bu[u])
-                    bi[i] += lr * (err - reg * bi[i])
+            u_idx, i_idx, r_vals = self._get_ratings_arrays()
+            global_mean = self.trainset.global_mean
+
+            # The lock-free parallel kernel is racy (results are not
+            # reproducible run to run), so it has to be asked for explicitly
+            # with the 'parallel' field of bsl_options: n_jobs only controls
+            # prediction parallelism and must not change training semantics.
+            if (self.bsl_options.get('parallel', False) and
+                    _sgd_biases_hogwild is not None):
+                # Hogwild-style parallel loop over all cores (needs numba).
+                # A local RandomState leaves the global np.random untouched.
+                perm = np.random.RandomState().permutation(len(r_vals))
+                _sgd_biases_hogwild(u_idx, i_idx, r_vals, perm, bu, bi,
+                                    global_mean, lr, reg, n_epochs)
+            elif _c_baselines is not None:
+                # compiled per-rating loop
+                _c_baselines._sgd(u_idx, i_idx, r_vals, bu, bi, global_mean,
+                                  lr, reg, n_epochs)
+            elif _sgd_biases is not None:
+                # JIT-compiled per-rating loop (needs numba)
+                _sgd_biases(u_idx, i_idx, r_vals, bu, bi, global_mean,
+                            lr, reg, n_epochs)
+            else:
+                for dummy in range(n_epochs):
+                    err = r_vals - (global_mean + bu[u_idx] + bi[i_idx])
+                    # np.add.at (and not fancy-indexed '+=') so that users
+                    # and items appearing more than once get all their
+                    # updates
+                    np.add.at(bu, u_idx, lr * (err - reg * bu[u_idx]))
+                    np.add.at(bi, i_idx, lr * (err - reg * bi[i_idx]))
 
             return bu, bi
 
@@ -170,23 +435,50 @@ class AlgoBase:
             # see also https://www.youtube.com/watch?v=gCaOa3W9kM0&t=32m55s
             # (Alex Smola on RS, ML Class 10-701)
 
-            bu = np.zeros(self.trainset.n_users)
-            bi = np.zeros(self.trainset.n_items)
+            n_users = self.trainset.n_users
+            n_items = self.trainset.n_items
+            bu, bi = self._initial_biases()
 
             reg_u = self.bsl_options.get('reg_u', 15)
             reg_i = self.bsl_options.get('reg_i', 10)
             n_epochs = self.bsl_options.get('n_epochs', 10)
+            tol = self.bsl_options.get('tol', 1e-4)
+
+            # user-major arrays for the bu update, item-sorted ones for the
+            # bi update, so both reductions walk their bias array in order
+            u_idx, i_idx, r_vals = self._get_ratings_arrays()
+            ubi_idx, ibi_idx, rbi_vals = self._get_ratings_arrays_by_item()
+            counts_u, counts_i = self._get_ratings_counts()
+            global_mean = self.trainset.global_mean
+
+            if _c_baselines is not None:
+                # compiled scatter-reduce loops
+                _c_baselines._als(u_idx, i_idx, r_vals,
+                                  ubi_idx, ibi_idx, rbi_vals, bu, bi,
+                                  counts_u, counts_i, global_mean,
+                                  reg_u, reg_i, n_epochs, tol)
+                return bu, bi
+
+            dev = r_vals - global_mean
+            dev_by_i = rbi_vals - global_mean
 
             for dummy in range(n_epochs):
-                for i in self.trainset.all_items():
-                    devI = sum(r - self.trainset.global_mean -
-                               bu[u] for (u, r) in self.trainset.ir[i])
-                    bi[i] = devI / (reg_i + len(self.trainset.ir[i]))
-
-                for u in self.trainset.all_users():
-                    devU = sum(r - self.trainset.global_mean -
-                               bi[i] for (i, r) in self.trainset.ur[u])
-                    bu[u] = devU / (reg_u + len(self.trainset.ur[u]))
+                # bincount accumulates in double, so cast back to float32
+                bi_new = (np.bincount(ibi_idx,
+                                      weights=(dev_by_i - bu[ubi_idx]),
+                                      minlength=n_items) /
+                          (reg_i + counts_i)).astype(np.float32)
+                bu_new = (np.bincount(u_idx, weights=(dev - bi_new[i_idx]),
+                                      minlength=n_users) /
+                          (reg_u + counts_u)).astype(np.float32)
+
+                # stop early once biases have stabilized (L-inf norm of the
+                # update below tol)
+                delta = max(np.abs(bu_new - bu).max(),
+                            np.abs(bi_new - bi).max())
+                bu, bi = bu_new, bi_new
+                if delta < tol:
+                    break
 
             return bu, bi
 
@@ -198,11 +490,30 @@ class AlgoBase:
         try:
             print('Estimating biases using', method + '...')
             self.bu, self.bi = optimize[method]()
-            return self.bu, self.bi
         except KeyError:
             raise ValueError('invalid method ' + method + ' for baseline ' +
                              'computation. Available methods are als, sgd.')
 
+        if self.bsl_options.get('warm_start', False):
+            # remember the biases by raw id so that the next trainset can
+            # start from them (see _initial_biases for the caveats)
+            for raw_u, inner_u in iteritems(self.trainset.raw2inner_id_users):
+                self._prev_bu_by_raw[raw_u] = self.bu[inner_u]
+            for raw_i, inner_i in iteritems(self.trainset.raw2inner_id_items):
+                self._prev_bi_by_raw[raw_i] = self.bi[inner_i]
+
+        self._baselines = (self.bu, self.bi)
+        return self._baselines
+
+    @property
+    def baselines(self):
+        """Tuple ``(bu, bi)`` of users and items baselines.
+
+        Computed on first access, then returned from cache in O(1) (the
+        cache is reset by :meth:`train`)."""
+
+        return self.compute_baselines()
+
     def compute_similarities(self):
         """Build the simlarity matrix.
 
@@ -210,37 +521,72 @@ class AlgoBase:
         ``sim_options`` parameter passed at the creation of the algorithm (see
         :ref:`similarity_measures_configuration`).
 
+        If a ``cache_dir`` field is set in ``sim_options``, the similarity
+        matrix is saved there (as a ``.npy`` file keyed by a hash of the
+        trainset and of the options), and later calls on an identical trainset
+        load it back as a memory-mapped array instead of rebuilding it. This
+        is worth it when folds overlap or when several algorithms share the
+        same similarity configuration.
+
         Returns:
             The similarity matrix."""
 
+        cache_dir = self.sim_options.get('cache_dir', None)
+        if cache_dir is not None:
+            cache_path = self._sim_cache_path(cache_dir)
+            if os.path.isfile(cache_path):
+                print('loading the similarity matrix from', cache_path)
+                return np.load(cache_path, mmap_mode='r')
+
         print("computing the similarity matrix...")
-        construction_func = {'cosine': sims.cosine,
-                             'msd': sims.msd,
-                             'pearson': sims.pearson,
-                             'pearson_baseline': sims.pearson_baseline}
 
         if self.sim_options['user_based']:
             n_x, yr = self.trainset.n_users, self.trainset.ir
         else:
             n_x, yr = self.trainset.n_items, self.trainset.ur
 
-        min_support = self.sim_options.get('min_support', 1)
-
-        args = [n_x, yr, min_support]
-
-        name = self.sim_options.get('name', 'msd').lower()
-        if name == 'pearson_baseline':
-            shrinkage = self.sim_options.get('shrinkage', 100)
-            bu, bi = self.compute_baselines()
+        if self._sim_name == 'pearson_baseline':
+            # the biases depend on the trainset so they cannot be bound at
+            # __init__ time like the scalar parameters
+            bu, bi = self.baselines
             if self.sim_options['user_based']:
                 bx, by = bu, bi
             else:
                 bx, by = bi, bu
 
-            args += [self.trainset.global_mean, bx, by, shrinkage]
-
-        try:
-            return construction_func[name](*args)
-        except KeyError:
-            raise NameError('Wrong sim name ' + name + '. Allowed values ' +
-                            'are ' + ', '.join(construction_func.keys()) + '.')
+            # the similarity kernel expects double-typed bias arrays
+            sim = self._sim_fn(n_x, yr,
+                               global_mean=self.trainset.global_mean,
+                               x_biases=np.asarray(bx, dtype=np.double),
+                               y_biases=np.asarray(by, dtype=np.double))
+        else:
+            sim = self._sim_fn(n_x, yr)
+
+        if cache_dir is not None:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            np.save(cache_path, sim)
+
+        return sim
+
+    def _sim_cache_path(self, cache_dir, digest_size=20):
+        """Return the cache file path of the similarity matrix, built from a
+        hash of the trainset ratings and of ``sim_options``. For
+        pearson_baseline the actual bias arrays are hashed in as well:
+        ``bsl_options`` alone does not determine them (e.g. when biases are
+        warm-started from a previous trainset), and the matrix must never be
+        loaded for biases it was not computed from."""
+
+        h = hashlib.blake2b(digest_size=digest_size)
+        options = [sorted((k, v) for (k, v) in iteritems(self.sim_options)
+                          if k != 'cache_dir'),
+                   sorted(iteritems(self.bsl_options))]
+        h.update(repr(options).encode('utf-8'))
+        if self._sim_name == 'pearson_baseline':
+            bu, bi = self.baselines
+            h.update(np.ascontiguousarray(bu).tobytes())
+            h.update(np.ascontiguousarray(bi).tobytes())
+        for i in range(self.trainset.n_items):
+            h.update(repr(self.trainset.ir[i]).encode('utf-8'))
+
+        return os.path.join(cache_dir, 'sim-' + h.hexdigest() + '.npy')
@@ -5,6 +5,8 @@ Algorithm predicting only the baseline.
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import numpy as np
+
 from .algo_base import AlgoBase
 
 
@@ -25,14 +27,14 @@ class BaselineOnly(AlgoBase):
             accepted options.
     """
 
-    def __init__(self, bsl_options={}):
+    def __init__(self, bsl_options={}, **kwargs):
 
-        AlgoBase.__init__(self, bsl_options=bsl_options)
+        AlgoBase.__init__(self, bsl_options=bsl_options, **kwargs)
 
     def train(self, trainset):
 
         AlgoBase.train(self, trainset)
-        self.bu, self.bi = self.compute_baselines()
+        self.bu, self.bi = self.baselines
 
     def estimate(self, u, i):
 
@@ -43,3 +45,18 @@ class BaselineOnly(AlgoBase):
             est += self.bi[i]
 
         return est
+
+    def estimate_batch(self, iuids, iiids):
+        """Vectorized version of :meth:`estimate`: the baselines of all the
+        (user, item) pairs are computed with two masked gathers."""
+
+        ests = np.full(len(iuids), self.trainset.global_mean)
+
+        known_u = iuids >= 0
+        known_i = iiids >= 0
+        ests[known_u] += self.bu[iuids[known_u]]
+        ests[known_i] += self.bi[iiids[known_i]]
+
+        details_list = [{'was_impossible': False} for _ in range(len(iuids))]
+
+        return ests, details_list
@@ -8,7 +8,6 @@ import numpy as np
 
 from .predictions import PredictionImpossible
 from .algo_base import AlgoBase
-from ..six import iteritems
 
 
 # Important note: as soon as an algorithm uses a similarity measure, it should
@@ -167,9 +166,14 @@ class KNNWithMeans(SymmetricAlgo):
         SymmetricAlgo.train(self, trainset)
         self.sim = self.compute_similarities()
 
-        self.means = np.zeros(self.n_x)
-        for x, ratings in iteritems(self.xr):
-            self.means[x] = np.mean([r for (_, r) in ratings])
+        # mean rating of each x, as a sum/count scatter-reduction over the
+        # rating arrays
+        u_idx, i_idx, r_vals = self._get_ratings_arrays()
+        counts_u, counts_i = self._get_ratings_counts()
+        (x_idx, counts_x), _ = self.switch((u_idx, counts_u),
+                                           (i_idx, counts_i))
+        self.means = (np.bincount(x_idx, weights=r_vals, minlength=self.n_x) /
+                      counts_x)
 
     def estimate(self, u, i):
 
@@ -249,10 +253,11 @@ class KNNBaseline(SymmetricAlgo):
 
     """
 
-    def __init__(self, k=40, min_k=1, sim_options={}, bsl_options={}):
+    def __init__(self, k=40, min_k=1, sim_options={}, bsl_options={},
+                 **kwargs):
 
         SymmetricAlgo.__init__(self, sim_options=sim_options,
-                               bsl_options=bsl_options)
+                               bsl_options=bsl_options, **kwargs)
 
         self.k = k
         self.min_k = min_k
@@ -260,7 +265,7 @@ class KNNBaseline(SymmetricAlgo):
     def train(self, trainset):
 
         SymmetricAlgo.train(self, trainset)
-        self.bu, self.bi = self.compute_baselines()
+        self.bu, self.bi = self.baselines
         self.bx, self.by = self.switch(self.bu, self.bi)
         self.sim = self.compute_similarities()
 
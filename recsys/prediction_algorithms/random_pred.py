@@ -33,8 +33,8 @@ class NormalPredictor(AlgoBase):
 
         AlgoBase.train(self, trainset)
 
-        num = sum((r - self.trainset.global_mean)**2
-                  for (_, _, r) in self.trainset.all_ratings())
+        _, _, r_vals = self._get_ratings_arrays()
+        num = np.sum((r_vals - self.trainset.global_mean)**2)
         denum = self.trainset.n_ratings
         self.sigma = np.sqrt(num / denum)
 
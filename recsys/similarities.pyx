@@ -310,12 +310,17 @@ def pearson_baseline(n_x, yr, min_support, global_mean, x_biases, y_biases,
     cdef np.ndarray[np.double_t,    ndim = 1] y_biases_ = y_biases
     cdef double global_mean_ = global_mean
 
+    # xs and residuals r_xy - b_xy of the ratings of the current y, filled
+    # once per y so that residuals are not recomputed for every pair
+    cdef np.ndarray[np.int_t,    ndim = 1] xs
+    cdef np.ndarray[np.double_t, ndim = 1] diffs
 
     # these variables need to be cdef'd so that array lookup can be fast
     cdef int xi = 0
     cdef int xj = 0
-    cdef double ri = 0
-    cdef double rj = 0
+    cdef int ki = 0
+    cdef int kj = 0
+    cdef int n_y = 0
     cdef double diff_i = 0
     cdef double diff_j = 0
     cdef double partial_bias = 0
@@ -324,18 +329,26 @@ def pearson_baseline(n_x, yr, min_support, global_mean, x_biases, y_biases,
 
     # Need this because of shrinkage. When pearson coeff is zero when support
     # is 1, so that's OK.
-    min_sprt = max(2, min_sprt) 
+    min_sprt = max(2, min_sprt)
 
     for y, y_ratings in iteritems(yr):
         partial_bias = global_mean_ + y_biases_[y]
-        for xi, ri in y_ratings:
-            for xj, rj in y_ratings:
+        n_y = len(y_ratings)
+        xs = np.empty(n_y, np.int)
+        diffs = np.empty(n_y, np.double)
+        for ki, (xi, ri) in enumerate(y_ratings):
+            xs[ki] = xi
+            diffs[ki] = ri - (partial_bias + x_biases_[xi])
+        for ki in range(n_y):
+            xi = xs[ki]
+            diff_i = diffs[ki]
+            for kj in range(n_y):
+                xj = xs[kj]
+                diff_j = diffs[kj]
                 freq[xi, xj] += 1
-                diff_i = (ri - (partial_bias + x_biases_[xi]))
-                diff_j = (rj - (partial_bias + x_biases_[xj]))
                 prods[xi, xj] += diff_i * diff_j
-                sq_diff_i[xi, xj] += diff_i**2
-                sq_diff_j[xi, xj] += diff_j**2
+                sq_diff_i[xi, xj] += diff_i * diff_i
+                sq_diff_j[xi, xj] += diff_j * diff_j
 
     for xi in range(n_x):
         sim[xi, xi] = 1
@@ -29,6 +29,9 @@ extensions = [Extension('recsys.similarities',
               Extension('recsys.prediction_algorithms.matrix_factorization',
                         ['recsys/prediction_algorithms/matrix_factorization.pyx'],
                         include_dirs=[np.get_include()]),
+              Extension('recsys.prediction_algorithms._baselines',
+                        ['recsys/prediction_algorithms/_baselines.pyx'],
+                        include_dirs=[np.get_include()]),
              ]
 ext_modules = cythonize(extensions)
 
@@ -134,17 +134,83 @@ def test_sgd_reg_field():
     """Ensure the reg field is taken into account."""
 
     bsl_options = {'method': 'sgd',
-                   'n_epochs': 1,
+                   'n_epochs': 2,
                    'reg': 0.02,
                    }
     algo = BaselineOnly(bsl_options=bsl_options)
     rmse_sgd_reg_002 = evaluate(algo, data, measures=['rmse'])['rmse']
 
     bsl_options = {'method': 'sgd',
-                   'n_epochs': 1,
+                   'n_epochs': 2,
                    'reg': 1,
                    }
     algo = BaselineOnly(bsl_options=bsl_options)
     rmse_sgd_reg_1 = evaluate(algo, data, measures=['rmse'])['rmse']
 
     assert rmse_sgd_reg_002 != rmse_sgd_reg_1
+
+
+def test_als_tol_field():
+    """Ensure the tol field is taken into account."""
+
+    bsl_options = {'method': 'als',
+                   'n_epochs': 10,
+                   'tol': 0,
+                   }
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_als_tol_0 = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    # a huge tolerance makes the procedure stop right after the first epoch
+    bsl_options = {'method': 'als',
+                   'n_epochs': 10,
+                   'tol': 10,
+                   }
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_als_tol_10 = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    assert rmse_als_tol_0 != rmse_als_tol_10
+
+
+def test_warm_start_field():
+    """Ensure the warm_start field is taken into account."""
+
+    # without warm-starting (the default), successive trainings of the same
+    # algorithm are independent and give the very same baselines
+    bsl_options = {'method': 'sgd',
+                   'n_epochs': 1,
+                   }
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_first = evaluate(algo, data, measures=['rmse'])['rmse']
+    rmse_second = evaluate(algo, data, measures=['rmse'])['rmse']
+    assert rmse_first == rmse_second
+
+    # with warm-starting, the second training resumes from the biases of the
+    # first one instead of starting from zero
+    bsl_options = {'method': 'sgd',
+                   'n_epochs': 1,
+                   'warm_start': True,
+                   }
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_first = evaluate(algo, data, measures=['rmse'])['rmse']
+    rmse_second = evaluate(algo, data, measures=['rmse'])['rmse']
+    assert rmse_first != rmse_second
+
+
+def test_sgd_parallel_field():
+    """Ensure the parallel field is taken into account (needs numba)."""
+
+    pytest.importorskip('numba')
+
+    bsl_options = {'method': 'sgd'}
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_serial = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    bsl_options = {'method': 'sgd',
+                   'parallel': True,
+                   }
+    algo = BaselineOnly(bsl_options=bsl_options)
+    rmse_parallel = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    # the Hogwild updates are racy so the results are not bit-identical to
+    # the sequential ones, but they have to land very close
+    assert abs(rmse_serial[0] - rmse_parallel[0]) < .01
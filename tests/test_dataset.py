@@ -124,10 +124,30 @@ def test_trainset_testset():
     assert trainset.r_max == 5
 
     # test raw2inner: ensure inner ids are given in proper order
-    raw2inner_id_users = trainset._raw2inner_id_users
+    raw2inner_id_users = trainset.raw2inner_id_users
     for i in range(4):
         assert raw2inner_id_users['user' + str(i)] == i
 
-    raw2inner_id_items = trainset._raw2inner_id_items
+    raw2inner_id_items = trainset.raw2inner_id_items
     for i in range(2):
         assert raw2inner_id_items['item' + str(i)] == i
+
+
+def test_duplicated_ratings(tmpdir):
+    """Ensure that a file with duplicated (user, item) pairs is handled: ur,
+    ir and the rating arrays all keep the duplicates, and n_ratings counts
+    them."""
+
+    ratings_path = tmpdir.join('duplicated_ratings')
+    ratings_path.write('user0 item0 1\n'
+                       'user0 item0 2\n'
+                       'user0 item1 3\n'
+                       'user1 item0 4\n')
+    dup_reader = Reader(line_format='user item rating', sep=' ',
+                        rating_scale=(1, 5))
+    data = Dataset.load_from_file(file_path=str(ratings_path),
+                                  reader=dup_reader)
+    trainset = data.build_full_trainset()
+
+    assert trainset.n_ratings == 4
+    assert len(list(trainset.all_ratings())) == 4
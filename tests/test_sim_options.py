@@ -54,6 +54,24 @@ def test_name_field():
         evaluate(algo, data)
 
 
+def test_cache_dir_field(tmpdir):
+    """Ensure the cache_dir field is taken into account."""
+
+    sim_options = {'name': 'msd', 'cache_dir': str(tmpdir)}
+
+    algo = KNNBasic(sim_options=sim_options)
+    rmse_first = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    # the similarity matrix should now be cached on disk...
+    assert any(f.startswith('sim-') for f in os.listdir(str(tmpdir)))
+
+    # ... and reloading it should not change the results
+    algo = KNNBasic(sim_options=sim_options)
+    rmse_second = evaluate(algo, data, measures=['rmse'])['rmse']
+
+    assert rmse_first == rmse_second
+
+
 def test_user_based_field():
     """Ensure that the user_based field is taken into account (only) when
     needed."""